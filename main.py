@@ -1,12 +1,22 @@
 import asyncio
 import logging
+import time
 
-from aiogram import Bot, Dispatcher
-from aiogram.client.default import DefaultBotProperties
-from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
-from src.bot.handlers import router as main_router
-from src.core.config import settings
+background_tasks = set()
+
+
+async def warm_up_panel():
+    from src.api.panel import warm_up
+
+    started_at = time.perf_counter()
+    try:
+        await asyncio.to_thread(warm_up)
+    except Exception as e:
+        logging.warning(f"Panel warm-up failed: {e}")
+        return
+    logging.info(
+        f"Panel warm-up took {(time.perf_counter() - started_at) * 1000:.0f} ms"
+    )
 
 
 async def main():
@@ -14,16 +24,50 @@ async def main():
         level=logging.INFO,
         format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
     )
+    started_at = time.perf_counter()
+
+    from src.core.config import get_settings
+
+    settings = get_settings()
+    config_loaded_at = time.perf_counter()
+    logging.info(
+        f"Config import and validation took "
+        f"{(config_loaded_at - started_at) * 1000:.0f} ms"
+    )
+
+    from aiogram import Bot, Dispatcher
+    from aiogram.client.default import DefaultBotProperties
+    from aiogram.enums import ParseMode
+
+    from src.bot.handlers import router as main_router
+    from src.bot.middlewares import TelegramTracingMiddleware, TracingMiddleware
+    from src.core.storage import storage
+
+    logging.info(
+        f"Bot imports took {(time.perf_counter() - config_loaded_at) * 1000:.0f} ms"
+    )
 
     bot = Bot(
         token=settings.BOT_TOKEN,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
-    storage = MemoryStorage()
     dp = Dispatcher(storage=storage)
 
     dp.include_router(main_router)
 
+    if settings.TRACE_ENABLED:
+        bot.session.middleware(TelegramTracingMiddleware())
+        dp.message.middleware(TracingMiddleware())
+        dp.callback_query.middleware(TracingMiddleware())
+
+    async def on_startup():
+        task = asyncio.create_task(warm_up_panel())
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+        logging.info(f"Startup took {(time.perf_counter() - started_at) * 1000:.0f} ms")
+
+    dp.startup.register(on_startup)
+
     await bot.delete_webhook(drop_pending_updates=True)
     await dp.start_polling(bot)
 
@@ -0,0 +1,16 @@
+from src.core.config import settings
+from src.core.storage import storage
+
+
+def create_api():
+    from src.api.xui_api import XUIApi
+
+    return XUIApi(
+        settings.PANEL_URL, settings.PANEL_LOGIN, settings.PANEL_PASSWORD, storage
+    )
+
+
+def warm_up():
+    api = create_api()
+    api.login()
+    api.get_profiles(settings.VLESS_INBOUND_ID)
@@ -6,16 +6,23 @@ from urllib.parse import quote, urlencode, urljoin
 
 import requests
 from src.core.config import settings
+from src.core.tracing import json_dumps, json_loads, span
+
+
+class SessionExpiredError(ConnectionError):
+    pass
 
 
 class XUIApi:
-    def __init__(self, panel_url, username, password):
+    def __init__(self, panel_url, username, password, cache=None):
         self.base_url = panel_url.rstrip("/")
         self.session = requests.Session()
         self.session.headers.update({"Accept": "application/json"})
         self.username = username
         self.password = password
         self.xray_config = None
+        self.cache = cache
+        self._session_restored = False
 
     def _build_url(self, *parts):
         path = "/".join(map(str, parts))
@@ -23,24 +30,86 @@ class XUIApi:
 
     def _make_request(self, method, url, **kwargs):
         try:
-            r = self.session.request(method, url, timeout=10, **kwargs)
+            response = self._send_request(method, url, **kwargs)
+        except SessionExpiredError:
+            if not self._session_restored:
+                raise
+            self._session_restored = False
+            self._login()
+            return self._send_request(method, url, **kwargs)
+        self._session_restored = False
+        return response
+
+    def _send_request(self, method, url, **kwargs):
+        path = url[len(self.base_url) :].lstrip("/")
+        try:
+            with span(f"panel {method.upper()} {path}") as current:
+                r = self.session.request(method, url, timeout=10, **kwargs)
+                if current is not None:
+                    current.attrs.update(status=r.status_code, size=len(r.content))
+            if (
+                r.status_code == 401
+                or (r.history and r.url != url)
+                or (
+                    self._session_restored
+                    and r.status_code == 404
+                    and path.startswith("panel/api/")
+                )
+            ):
+                raise SessionExpiredError(
+                    f"Panel session expired (status {r.status_code})"
+                )
             r.raise_for_status()
             if not r.text:
                 return {"success": True}
-            return r.json()
-        except requests.exceptions.JSONDecodeError:
+            return json_loads(r.text, path)
+        except json.JSONDecodeError:
             raise ConnectionError(
                 f"Failed to decode JSON. Server response (status {r.status_code}):\n{r.text}"
             )
         except requests.exceptions.RequestException as e:
             raise ConnectionError(f"Request failed: {e}")
 
+    def _cache_get(self, namespace, key):
+        if self.cache is None:
+            return None
+        return self.cache.get_cache(namespace, f"{self.base_url}|{key}")
+
+    def _cache_generation(self, namespace, key):
+        if self.cache is None:
+            return None
+        return self.cache.cache_generation(namespace, f"{self.base_url}|{key}")
+
+    def _cache_set(self, namespace, key, value, generation=None):
+        if self.cache is not None:
+            self.cache.set_cache(
+                namespace,
+                f"{self.base_url}|{key}",
+                value,
+                ttl=settings.CACHE_TTL,
+                generation=generation,
+            )
+
+    def _cache_delete(self, namespace, key):
+        if self.cache is not None:
+            self.cache.delete_cache(namespace, f"{self.base_url}|{key}")
+
     def login(self):
+        cookies = self._cache_get("panel_cookie", self.username)
+        if cookies:
+            self.session.cookies.update(cookies)
+            self._session_restored = True
+            return True
+        return self._login()
+
+    def _login(self):
+        self._cache_delete("panel_cookie", self.username)
         login_url = self._build_url("login")
         payload = {"username": self.username, "password": self.password}
-        response = self._make_request("post", login_url, data=payload)
+        response = self._send_request("post", login_url, data=payload)
         if not response.get("success"):
             raise ConnectionError(f"Login failed: {response.get('msg')}")
+        self._cache_set("panel_cookie", self.username, self.session.cookies.get_dict())
         return True
 
     def _get_xray_config(self):
@@ -48,7 +117,7 @@ class XUIApi:
         response = self._make_request("post", url)
         if not response.get("success"):
             raise RuntimeError(f"Failed to get Xray config: {response.get('msg')}")
-        self.xray_config = json.loads(response["obj"])["xraySetting"]
+        self.xray_config = json_loads(response["obj"], "xray config")["xraySetting"]
         return self.xray_config
 
     def _update_xray_config(self):
@@ -56,7 +125,7 @@ class XUIApi:
             raise ValueError("Xray config is not loaded.")
 
         url = self._build_url("panel/xray/update")
-        payload = {"xraySetting": json.dumps(self.xray_config, indent=2)}
+        payload = {"xraySetting": json_dumps(self.xray_config, "xray config", indent=2)}
         response = self._make_request("post", url, data=payload)
         if not response.get("success"):
             raise RuntimeError(f"Failed to update Xray config: {response.get('msg')}")
@@ -66,7 +135,9 @@ class XUIApi:
         client_remark_to_check = f"user-{remark.lower().replace(' ', '-')[:20]}"
         try:
             inbound_data = self.get_inbound(inbound_id)
-            clients = json.loads(inbound_data.get("settings", "{}")).get("clients", [])
+            clients = json_loads(
+                inbound_data.get("settings", "{}"), "inbound settings"
+            ).get("clients", [])
             return any(
                 client.get("email") == client_remark_to_check for client in clients
             )
@@ -126,7 +197,10 @@ class XUIApi:
             "subId": "",
         }
         settings_payload = {"clients": [client_object]}
-        payload = {"id": inbound_id, "settings": json.dumps(settings_payload)}
+        payload = {
+            "id": inbound_id,
+            "settings": json_dumps(settings_payload, "client settings"),
+        }
         response = self._make_request("post", url, data=payload)
         if not response.get("success"):
             raise RuntimeError(f"Failed to add client: {response.get('msg')}")
@@ -149,7 +223,9 @@ class XUIApi:
             config["routing"]["rules"].insert(-2, new_rule)
         else:
             config["routing"]["rules"].append(new_rule)
-        return self._update_xray_config()
+        result = self._update_xray_config()
+        self._cache_delete("profiles", inbound_id)
+        return result
 
     def restart_xray(self):
         try:
@@ -164,7 +240,7 @@ class XUIApi:
         if not inbound_data:
             inbound_data = self.get_inbound(inbound_id)
 
-        stream_settings = json.loads(inbound_data["streamSettings"])
+        stream_settings = json_loads(inbound_data["streamSettings"], "stream settings")
         reality_settings = stream_settings.get("realitySettings", {})
         reality_advanced_settings = reality_settings.get("settings", reality_settings)
 
@@ -207,6 +283,11 @@ class XUIApi:
         return uri
 
     def get_profiles(self, inbound_id):
+        cached = self._cache_get("profiles", inbound_id)
+        if cached is not None:
+            return cached
+        generation = self._cache_generation("profiles", inbound_id)
+
         config = self._get_xray_config()
         routing_rules = config.get("routing", {}).get("rules", [])
         rules_map = {
@@ -216,7 +297,9 @@ class XUIApi:
         }
 
         inbound_data = self.get_inbound(inbound_id)
-        clients = json.loads(inbound_data.get("settings", "{}")).get("clients", [])
+        clients = json_loads(
+            inbound_data.get("settings", "{}"), "inbound settings"
+        ).get("clients", [])
 
         profiles = []
         for client in clients:
@@ -235,13 +318,16 @@ class XUIApi:
                             "profile_id": profile_id,
                         }
                     )
+        self._cache_set("profiles", inbound_id, profiles, generation=generation)
         return profiles
 
     def delete_profile(
         self, client_remark_to_delete, outbound_tag_to_delete, inbound_id
     ):
         inbound_data = self.get_inbound(inbound_id)
-        clients = json.loads(inbound_data.get("settings", "{}")).get("clients", [])
+        clients = json_loads(
+            inbound_data.get("settings", "{}"), "inbound settings"
+        ).get("clients", [])
 
         client_uuid_to_delete = next(
             (c.get("id") for c in clients if c.get("email") == client_remark_to_delete),
@@ -278,4 +364,5 @@ class XUIApi:
             ]
 
         self._update_xray_config()
+        self._cache_delete("profiles", inbound_id)
         return True
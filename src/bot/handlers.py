@@ -17,13 +17,15 @@ from aiogram.types import (
     InlineKeyboardMarkup,
     Message,
 )
-from aiogram.utils.markdown import hcode
+from aiogram.utils.markdown import hcode, hpre
 
-from src.api.xui_api import XUIApi
+from src.api.panel import create_api
 from src.bot.callbacks import ProfileCallback
 from src.bot.keyboards import get_profiles_markup
 from src.bot.states import ProfileCreation
+from src.core import tracing
 from src.core.config import settings
+from src.core.tracing import span
 
 router = Router()
 
@@ -52,7 +54,7 @@ async def create_proxy_profile(
     limit: int,
     days: int,
 ):
-    api = XUIApi(settings.PANEL_URL, settings.PANEL_LOGIN, settings.PANEL_PASSWORD)
+    api = create_api()
     api.login()
 
     sanitized_remark = remark.lower().replace(" ", "-").replace(":", "-")
@@ -82,7 +84,8 @@ async def create_proxy_profile(
 
         await msg.edit_text("Шаг 5/5: Перезапуск Xray и генерация ссылки...")
         api.restart_xray()
-        await asyncio.sleep(3)
+        with span("wait for xray restart"):
+            await asyncio.sleep(3)
 
         vless_uri = api.get_vless_uri(
             settings.VLESS_INBOUND_ID, new_uuid, remark, inbound_data=inbound_info
@@ -103,7 +106,7 @@ async def create_proxy_profile(
 async def create_direct_vless_profile(
     message: Message, remark: str, limit: int, days: int
 ):
-    api = XUIApi(settings.PANEL_URL, settings.PANEL_LOGIN, settings.PANEL_PASSWORD)
+    api = create_api()
     api.login()
 
     sanitized_remark = remark.lower().replace(" ", "-").replace(":", "-")
@@ -133,7 +136,8 @@ async def create_direct_vless_profile(
 
         await msg.edit_text("Шаг 4/4: Перезапуск Xray и генерация ссылки...")
         api.restart_xray()
-        await asyncio.sleep(3)
+        with span("wait for xray restart"):
+            await asyncio.sleep(3)
 
         vless_uri = api.get_vless_uri(
             settings.VLESS_INBOUND_ID, new_uuid, remark, inbound_data=inbound_info
@@ -243,6 +247,25 @@ async def cmd_vless(message: Message, command: CommandObject, state: FSMContext)
     )
 
 
+def is_admin(message: Message) -> bool:
+    return message.from_user is not None and message.from_user.id in settings.ADMIN_IDS
+
+
+@router.message(Command("trace"), is_admin)
+async def cmd_trace(message: Message, command: CommandObject):
+    if command.args != "last":
+        await message.answer("Использование: /trace last")
+        return
+    if not settings.TRACE_ENABLED:
+        await message.answer("Трассировка выключена (TRACE_ENABLED).")
+        return
+    if tracing.last_trace is None:
+        await message.answer("Пока нет ни одной записанной трассировки.")
+        return
+    waterfall = tracing.format_waterfall(tracing.last_trace)
+    await message.answer(hpre(waterfall[:4000]))
+
+
 @router.message(Command("list"))
 async def cmd_list(message: Message, state: FSMContext):
     await state.clear()
@@ -289,7 +312,7 @@ async def cq_confirm_delete(query: CallbackQuery, callback_data: ProfileCallback
 async def cq_execute_delete(query: CallbackQuery, callback_data: ProfileCallback):
     await query.message.edit_text("Удаляю профиль... ⏳")
     try:
-        api = XUIApi(settings.PANEL_URL, settings.PANEL_LOGIN, settings.PANEL_PASSWORD)
+        api = create_api()
         api.login()
 
         profiles = api.get_profiles(settings.VLESS_INBOUND_ID)
@@ -2,7 +2,7 @@ from math import ceil
 
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
-from src.api.xui_api import XUIApi
+from src.api.panel import create_api
 from src.bot.callbacks import ProfileCallback
 from src.core.config import settings
 
@@ -10,7 +10,7 @@ PROFILES_PER_PAGE = 10
 
 
 async def get_profiles_markup(page: int = 0) -> tuple[str, InlineKeyboardMarkup | None]:
-    api = XUIApi(settings.PANEL_URL, settings.PANEL_LOGIN, settings.PANEL_PASSWORD)
+    api = create_api()
     api.login()
     profiles = api.get_profiles(settings.VLESS_INBOUND_ID)
 
@@ -0,0 +1,37 @@
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from src.core.tracing import span, trace
+
+
+class TracingMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Message):
+            if event.text and event.text.startswith("/"):
+                name = event.text.split(maxsplit=1)[0].split("@", 1)[0]
+            else:
+                name = data.get("raw_state") or "message"
+        elif isinstance(event, CallbackQuery):
+            name = "callback " + "|".join((event.data or "").split("|")[:2])
+        else:
+            name = type(event).__name__
+        if name.startswith("/trace"):
+            return await handler(event, data)
+
+        user = data.get("event_from_user")
+        with trace(name, user=user.id if user else None):
+            return await handler(event, data)
+
+
+class TelegramTracingMiddleware(BaseRequestMiddleware):
+    async def __call__(self, make_request, bot, method):
+        with span(f"telegram {method.__api_method__}"):
+            return await make_request(bot, method)
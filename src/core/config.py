@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,8 +10,23 @@ class Settings(BaseSettings):
     PANEL_PASSWORD: str
     PUBLIC_HOST: str
     VLESS_INBOUND_ID: int
+    STORAGE_PATH: str = "bot_state.sqlite3"
+    CACHE_TTL: int = 300
+    ADMIN_IDS: list[int] = []
+    TRACE_ENABLED: bool = False
+    TRACE_SLOW_THRESHOLD: float = 5.0
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
+
+
+class LazySettings:
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+
+settings = LazySettings()
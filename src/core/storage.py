@@ -0,0 +1,213 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Mapping
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import (
+    BaseStorage,
+    DefaultKeyBuilder,
+    KeyBuilder,
+    StateType,
+    StorageKey,
+)
+
+from src.core.config import settings
+
+_DELETED = object()
+
+
+class SQLiteStorage(BaseStorage):
+    def __init__(
+        self,
+        path: str | None = None,
+        flush_interval: float = 0.5,
+        batch_size: int = 64,
+        key_builder: KeyBuilder | None = None,
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        self._lock = threading.RLock()
+        self._pending: dict[str, tuple[Any, float | None]] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._conn is None:
+                conn = sqlite3.connect(
+                    self.path or settings.STORAGE_PATH,
+                    check_same_thread=False,
+                    isolation_level=None,
+                )
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("PRAGMA busy_timeout=5000")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS kv ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS generations ("
+                    "key TEXT PRIMARY KEY, generation INTEGER NOT NULL)"
+                )
+                conn.execute("DELETE FROM kv WHERE expires_at < ?", (time.time(),))
+                self._conn = conn
+            return self._conn
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            conn = self.connection
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _read(self, key: str) -> Any:
+        with self._lock:
+            if key in self._pending:
+                value, expires_at = self._pending[key]
+                if value is _DELETED:
+                    return None
+            else:
+                row = self.connection.execute(
+                    "SELECT value, expires_at FROM kv WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                value, expires_at = json.loads(row[0]), row[1]
+        if expires_at is not None and expires_at < time.time():
+            return None
+        return value
+
+    def _store(
+        self, conn: sqlite3.Connection, key: str, value: Any, expires_at: float | None
+    ) -> None:
+        if value is _DELETED:
+            conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+        else:
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+
+    def _write_now(self, key: str, value: Any) -> None:
+        with self._transaction() as conn:
+            self._pending.pop(key, None)
+            self._store(conn, key, value, None)
+
+    def _write(self, key: str, value: Any, ttl: float | None = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._pending[key] = (value, expires_at)
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+                return
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        with self._lock:
+            if self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.flush_interval, self.flush)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            with self._transaction() as conn:
+                for key, (value, expires_at) in pending.items():
+                    self._store(conn, key, value, expires_at)
+
+    def get_cache(self, namespace: str, key: str) -> Any:
+        return self._read(f"cache:{namespace}:{key}")
+
+    def cache_generation(self, namespace: str, key: str) -> int:
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT generation FROM generations WHERE key = ?",
+                (f"cache:{namespace}:{key}",),
+            ).fetchone()
+        return row[0] if row else 0
+
+    def set_cache(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl: float | None = None,
+        generation: int | None = None,
+    ) -> None:
+        storage_key = f"cache:{namespace}:{key}"
+        if generation is None:
+            self._write(storage_key, value, ttl)
+            return
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT generation FROM generations WHERE key = ?", (storage_key,)
+            ).fetchone()
+            if (row[0] if row else 0) != generation:
+                return
+            self._pending.pop(storage_key, None)
+            self._store(conn, storage_key, value, time.time() + ttl if ttl else None)
+
+    def delete_cache(self, namespace: str, key: str) -> None:
+        storage_key = f"cache:{namespace}:{key}"
+        with self._transaction() as conn:
+            self._pending.pop(storage_key, None)
+            self._store(conn, storage_key, _DELETED, None)
+            conn.execute(
+                "INSERT INTO generations (key, generation) VALUES (?, 1) "
+                "ON CONFLICT(key) DO UPDATE SET generation = generation + 1",
+                (storage_key,),
+            )
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        storage_key = self.key_builder.build(key, "state")
+        if state is None:
+            self._write_now(storage_key, _DELETED)
+        else:
+            self._write_now(
+                storage_key, state.state if isinstance(state, State) else state
+            )
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return self._read(self.key_builder.build(key, "state"))
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        storage_key = self.key_builder.build(key, "data")
+        if not data:
+            self._write_now(storage_key, _DELETED)
+        else:
+            self._write_now(storage_key, dict(data))
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return dict(self._read(self.key_builder.build(key, "data")) or {})
+
+    async def close(self) -> None:
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+storage = SQLiteStorage()
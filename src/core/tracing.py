@@ -0,0 +1,90 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from src.core.config import settings
+
+_current_span = ContextVar("current_span", default=None)
+last_trace = None
+
+
+class Span:
+    def __init__(self, name, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.children = []
+        self.start = time.perf_counter()
+        self.end = None
+
+    @property
+    def duration(self):
+        return (self.end or time.perf_counter()) - self.start
+
+
+@contextmanager
+def span(name, **attrs):
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, **attrs)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    finally:
+        child.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+@contextmanager
+def trace(name, **attrs):
+    global last_trace
+    if not settings.TRACE_ENABLED:
+        yield None
+        return
+    root = Span(name, **attrs)
+    token = _current_span.set(root)
+    try:
+        yield root
+    finally:
+        root.end = time.perf_counter()
+        _current_span.reset(token)
+        last_trace = root
+        if root.duration >= settings.TRACE_SLOW_THRESHOLD:
+            logging.warning("Slow request:\n%s", format_waterfall(root))
+
+
+def json_loads(data, label):
+    with span(f"json.loads {label}", size=len(data)):
+        return json.loads(data)
+
+
+def json_dumps(obj, label, **kwargs):
+    with span(f"json.dumps {label}") as current:
+        data = json.dumps(obj, **kwargs)
+        if current is not None:
+            current.attrs["size"] = len(data)
+        return data
+
+
+def format_waterfall(root):
+    lines = [f"{root.name} {root.duration * 1000:.0f} ms{_format_attrs(root)}"]
+
+    def walk(node, depth):
+        for child in node.children:
+            offset = (child.start - root.start) * 1000
+            lines.append(
+                f"{offset:6.0f} +{child.duration * 1000:6.0f} ms "
+                f"{'  ' * depth}{child.name}{_format_attrs(child)}"
+            )
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    return "\n".join(lines)
+
+
+def _format_attrs(node):
+    return "".join(f" {key}={value}" for key, value in node.attrs.items())